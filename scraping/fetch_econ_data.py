@@ -1,12 +1,13 @@
 import pandas_datareader.data as web
 import pandas as pd
+import numpy as np
 import os
 from datetime import datetime
 
 # Configuration
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, 'data', 'raw')
-OUTPUT_FILE = os.path.join(DATA_DIR, 'econ_indicators.csv')
+OUTPUT_FILE = os.path.join(DATA_DIR, 'econ_indicators.parquet')
 
 # FRED Series IDs
 # Following the methodology from "Trillion Dollar Words":
@@ -18,10 +19,14 @@ INDICATORS = {
     'FEDFUNDS': 'Fed_Funds_Rate' 
 }
 
-def fetch_econ_data(start_date='2018-01-01', end_date=None):
+def fetch_econ_data(start_date='2018-01-01', end_date=None, indicators=None):
     """
     Fetches economic data from FRED.
+    `indicators` maps FRED series IDs to column names (defaults to INDICATORS),
+    so callers can request only the series they need.
     """
+    if indicators is None:
+        indicators = INDICATORS
     if end_date is None:
         end_date = datetime.now().strftime('%Y-%m-%d')
     
@@ -29,17 +34,21 @@ def fetch_econ_data(start_date='2018-01-01', end_date=None):
     
     try:
         # Fetch data
-        df = web.DataReader(list(INDICATORS.keys()), 'fred', start_date, end_date)
+        df = web.DataReader(list(indicators.keys()), 'fred', start_date, end_date)
         
         # Rename columns
-        df.rename(columns=INDICATORS, inplace=True)
+        df.rename(columns=indicators, inplace=True)
         
         # Calculate Year-over-Year (YoY) change
         # Methodology: "percentage change from last year"
         # Formula: (Current - Year_Ago) / Year_Ago * 100
-        df['CPI_YoY'] = df['CPI'].pct_change(12) * 100
-        df['PPI_YoY'] = df['PPI'].pct_change(12) * 100
-        df['Fed_Funds_Rate_YoY'] = df['Fed_Funds_Rate'].pct_change(12) * 100
+        # Computed for all series at once on the underlying 2D array
+        cols = list(indicators.values())
+        values = df[cols].to_numpy(dtype=np.float64)
+        yoy = np.full_like(values, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            yoy[12:] = (values[12:] / values[:-12] - 1.0) * 100.0
+        df[[f"{col}_YoY" for col in cols]] = yoy
         
         # Reset index to make DATE a column
         df.reset_index(inplace=True)
@@ -57,7 +66,7 @@ def save_data(df):
     if df is not None:
         os.makedirs(DATA_DIR, exist_ok=True)
         
-        df.to_csv(OUTPUT_FILE, index=False)
+        df.to_parquet(OUTPUT_FILE, engine='pyarrow', compression='snappy', index=False)
         print(f"Data saved successfully to {OUTPUT_FILE}")
         print(df.tail())
     else:
@@ -5,7 +5,7 @@ from datetime import datetime, timedelta
 
 # Configuration
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'raw')
-OUTPUT_FILE = os.path.join(DATA_DIR, 'market_data_vix_tnx.csv')
+OUTPUT_FILE = os.path.join(DATA_DIR, 'market_data_vix_tnx.parquet')
 
 # Tickers to fetch
 # ^VIX: CBOE Volatility Index
@@ -76,7 +76,7 @@ def save_data(df):
     """
     if df is not None:
         os.makedirs(DATA_DIR, exist_ok=True)
-        df.to_csv(OUTPUT_FILE, index=False)
+        df.to_parquet(OUTPUT_FILE, engine='pyarrow', compression='snappy', index=False)
         print(f"Data saved successfully to {OUTPUT_FILE}")
         print(df.head())
     else:
@@ -1,22 +1,36 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 import re
-import nltk
 import os
+import sys
 
-# 首次运行需要下载 nltk 的分词数据
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+# 与其他处理脚本共用 utils 中的 Punkt 加载器 (首次使用时才下载/加载模型，之后复用缓存)
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from utils.utilities import _load_sentence_tokenizer
+
+def read_csv_fast(file_path):
+    """用 pyarrow 的多线程 CSV 解析器读取 (文本字段中含换行符)"""
+    parse_options = pacsv.ParseOptions(newlines_in_values=True)
+    return pacsv.read_csv(file_path, parse_options=parse_options).to_pandas()
 
 def load_data(file_path):
-    """加载原始 CSV 数据"""
+    """加载原始数据 (Parquet 优先，兼容旧的 CSV)"""
     if not os.path.exists(file_path):
-        print(f"Error: File not found at {file_path}")
-        return None
+        # 回退到旧版爬虫输出的同名 CSV
+        csv_path = os.path.splitext(file_path)[0] + '.csv'
+        if not os.path.exists(csv_path):
+            print(f"Error: File not found at {file_path}")
+            return None
+        file_path = csv_path
     
-    df = pd.read_csv(file_path)
-    # 转换日期格式
+    if file_path.endswith('.parquet'):
+        # Parquet 保留了 dtype，无需重新解析
+        df = pd.read_parquet(file_path)
+    else:
+        df = read_csv_fast(file_path)
+    # 转换日期格式 (日期已是 datetime 时为空操作)
     df['date'] = pd.to_datetime(df['date'], errors='coerce')
     # 确保 text 列是字符串
     df['text'] = df['text'].astype(str)
@@ -24,67 +38,87 @@ def load_data(file_path):
     print(f"Successfully loaded {len(df)} documents.")
     return df
 
+# 定义我们关心的“高价值”章节标题 (标准化命名)
+# 键是标准化的列名，值是可能出现在文本中的标题关键词列表
+# 注意：按大概的出现顺序排列，但代码会根据实际 index 排序
+SECTION_PATTERNS = {
+    "Developments in Financial Markets": [
+        "Developments in Financial Markets and Open Market Operations"
+    ],
+    "Inflation Analysis": [
+        "Inflation Analysis and Forecasting"
+    ],
+    "Staff Review of Economic Situation": [
+        "Staff Review of the Economic Situation", 
+        "The information reviewed for the" # 有时这部分没有标题，直接以这句话开头
+    ],
+    "Staff Review of Financial Situation": [
+        "Staff Review of the Financial Situation"
+    ],
+    "Staff Economic Outlook": [
+        "Staff Economic Outlook"
+    ],
+    "Participants' Views": [
+        "Participants' Views on Current Conditions and the Economic Outlook", # 完整标题
+        "Participants' Views on Current Conditions",
+        "Participants’ Views on Current Conditions", # 智能引号
+        "Discussion of Monetary Policy" # 旧版纪要常用
+    ],
+    "Committee Policy Action": [
+        "Committee Policy Action"
+    ]
+}
+
+# 所有关键词 (小写) -> (章节名, 在该章节别名列表中的优先级)
+_SECTION_KEYWORDS = {
+    keyword.lower(): (section_name, rank)
+    for section_name, keywords in SECTION_PATTERNS.items()
+    for rank, keyword in enumerate(keywords)
+}
+# 将所有关键词合并成一个正则，一次扫描即可定位全部标题
+# 零宽前瞻 (?=...) 允许重叠匹配；同一位置优先匹配更长的关键词
+# IGNORECASE 直接扫描原文，无需先复制一份 text.lower()
+# 每个关键词单独一个捕获组：用 m.lastindex 查表，而不是把匹配到的文本再 lower() 回去
+# (Unicode 大小写折叠下，例如 "ſtaff" 也能匹配 "staff"，lower() 后却不是原关键词)
+_SECTION_ENTRIES = sorted(_SECTION_KEYWORDS.items(), key=lambda kv: len(kv[0]), reverse=True)
+_SECTION_RE = re.compile(
+    '(?=' + '|'.join('(' + re.escape(k) + ')' for k, _ in _SECTION_ENTRIES) + ')',
+    re.IGNORECASE
+)
+
 def extract_sections(text):
     """
     核心逻辑：解析 FOMC Minutes 的特定章节
     返回一个列表：[{'section_name': 'Staff Review', 'text': '...'}, ...]
     """
     
-    # 1. 定义我们关心的“高价值”章节标题 (标准化命名)
-    # 键是标准化的列名，值是可能出现在文本中的标题关键词列表
-    # 注意：按大概的出现顺序排列，但代码会根据实际 index 排序
-    section_patterns = {
-        "Developments in Financial Markets": [
-            "Developments in Financial Markets and Open Market Operations"
-        ],
-        "Inflation Analysis": [
-            "Inflation Analysis and Forecasting"
-        ],
-        "Staff Review of Economic Situation": [
-            "Staff Review of the Economic Situation", 
-            "The information reviewed for the" # 有时这部分没有标题，直接以这句话开头
-        ],
-        "Staff Review of Financial Situation": [
-            "Staff Review of the Financial Situation"
-        ],
-        "Staff Economic Outlook": [
-            "Staff Economic Outlook"
-        ],
-        "Participants' Views": [
-            "Participants' Views on Current Conditions and the Economic Outlook", # 完整标题
-            "Participants' Views on Current Conditions",
-            "Participants’ Views on Current Conditions", # 智能引号
-            "Discussion of Monetary Policy" # 旧版纪要常用
-        ],
-        "Committee Policy Action": [
-            "Committee Policy Action"
-        ]
-    }
+    # 1. 一次扫描找到所有标题在文中的位置
+    found = {}  # section_name -> (rank, start_index, header_length)
     
-    # 2. 找到所有标题在文中的位置
-    matches = []
-    text_lower = text.lower()
+    for m in _SECTION_RE.finditer(text):
+        keyword = m.group(m.lastindex)
+        section_name, rank = _SECTION_ENTRIES[m.lastindex - 1][1]
+        # 每个关键词只记录首次出现；同一章节优先使用列表中靠前的别名
+        if section_name not in found or rank < found[section_name][0]:
+            found[section_name] = (rank, m.start(), len(keyword))
     
-    for section_name, keywords in section_patterns.items():
-        for keyword in keywords:
-            idx = text_lower.find(keyword.lower())
-            if idx != -1:
-                matches.append({
-                    "section_name": section_name,
-                    "start_index": idx,
-                    "header_length": len(keyword), # Record length to skip header
-                    "priority": idx 
-                })
-                # 找到一个关键词后，该章节就定位了，跳过该章节的其他别名
-                break 
+    matches = [
+        {
+            "section_name": section_name,
+            "start_index": idx,
+            "header_length": header_length, # Record length to skip header
+            "priority": idx
+        }
+        for section_name, (rank, idx, header_length) in found.items()
+    ]
     
-    # 3. 按在文中出现的顺序排序
+    # 2. 按在文中出现的顺序排序
     if not matches:
         return []
     
     matches.sort(key=lambda x: x['priority'])
     
-    # 4. 切分文本
+    # 3. 切分文本
     extracted_data = []
     
     for i in range(len(matches)):
@@ -109,18 +143,37 @@ def extract_sections(text):
         
     return extracted_data
 
-def segment_sentences(df):
+# 句子级行政废话 (即使在章节内也可能出现)，合并为一个预编译正则
+NOISE_PHRASES = [
+    "meeting adjourned", 
+    "vote against", 
+    "voting for this action",
+    "voting against this action"
+]
+_NOISE_RE = re.compile('|'.join(re.escape(p) for p in NOISE_PHRASES), re.IGNORECASE)
+_WS_RE = re.compile(r'\s+')
+
+# 句子级输出的列结构 (与 Parquet schema 一一对应)
+# section / source_type 只有少数几个取值，用字典编码 (读回 pandas 即为 category)
+SENTENCE_COLUMNS = ['original_doc_id', 'date', 'section', 'sentence_text', 'source_type']
+CATEGORY_COLUMNS = ['section', 'source_type']
+SENTENCE_SCHEMA = pa.schema([
+    ('original_doc_id', pa.int64()),
+    ('date', pa.timestamp('ns')),
+    ('section', pa.dictionary(pa.int32(), pa.string())),
+    ('sentence_text', pa.large_string()),
+    ('source_type', pa.dictionary(pa.int32(), pa.string()))
+])
+
+def iter_sentences(df):
     """
-    将文档级的 DataFrame 转换为句子级的 DataFrame，并增加 'section' 列
+    逐句产出 (original_doc_id, date, section, sentence_text, source_type) 元组
     """
-    processed_rows = []
-    
     print("Segmenting text into sentences with section labels...")
+    sent_tokenizer = _load_sentence_tokenizer()
     
-    for idx, row in df.iterrows():
-        doc_text = row['text']
-        date = row['date']
-        doc_id = idx
+    # 直接遍历列数组；iterrows 会为每一行构造一个 Series，开销很大
+    for doc_id, date, doc_text in zip(df.index.to_numpy(), df['date'].to_numpy(), df['text'].to_numpy()):
         
         # 1. 提取章节 (这会自动过滤掉不在列表中的 administrative 内容)
         sections = extract_sections(doc_text)
@@ -135,10 +188,10 @@ def segment_sentences(df):
             section_content = section['section_text']
             
             # 清理一下文本中的多余空白
-            section_content = re.sub(r'\s+', ' ', section_content).strip()
+            section_content = _WS_RE.sub(' ', section_content).strip()
             
             # 2. 分句
-            sentences = nltk.sent_tokenize(section_content)
+            sentences = sent_tokenizer.tokenize(section_content)
             
             for sent in sentences:
                 sent = sent.strip()
@@ -148,48 +201,66 @@ def segment_sentences(df):
                     continue
                 
                 # 过滤行政废话 (即使在章节内也可能出现)
-                lower_sent = sent.lower()
-                noise_phrases = [
-                    "meeting adjourned", 
-                    "vote against", 
-                    "voting for this action",
-                    "voting against this action"
-                ]
-                
-                if any(phrase in lower_sent for phrase in noise_phrases):
+                if _NOISE_RE.search(sent):
                     continue
                 
-                processed_rows.append({
-                    'original_doc_id': doc_id,
-                    'date': date,
-                    'section': section_name, # 新增的列！
-                    'sentence_text': sent,
-                    'source_type': 'Minutes'
-                })
-            
-    return pd.DataFrame(processed_rows)
+                yield (doc_id, date, section_name, sent, 'Minutes')
+
+def segment_sentences(df):
+    """
+    将文档级的 DataFrame 转换为句子级的 DataFrame，并增加 'section' 列
+    """
+    sentences = pd.DataFrame(list(iter_sentences(df)), columns=SENTENCE_COLUMNS)
+    return sentences.astype({col: 'category' for col in CATEGORY_COLUMNS})
+
+def write_sentences_parquet(df, output_path, row_group_size=100_000):
+    """
+    分句并按 row group 流式写入 Parquet，内存峰值只取决于 row_group_size
+    返回写入的句子总数
+    """
+    buffer = {col: [] for col in SENTENCE_COLUMNS}
+    total = 0
+    
+    def flush(writer):
+        chunk = pd.DataFrame(buffer, columns=SENTENCE_COLUMNS)
+        writer.write_table(pa.Table.from_pandas(chunk, schema=SENTENCE_SCHEMA, preserve_index=False))
+        for values in buffer.values():
+            values.clear()
+    
+    with pq.ParquetWriter(output_path, SENTENCE_SCHEMA, compression='snappy') as writer:
+        for row in iter_sentences(df):
+            for col, value in zip(SENTENCE_COLUMNS, row):
+                buffer[col].append(value)
+            total += 1
+            if len(buffer['sentence_text']) >= row_group_size:
+                flush(writer)
+        if buffer['sentence_text']:
+            flush(writer)
+    
+    return total
 
 if __name__ == "__main__":
     # 配置路径
-    INPUT_PATH = r"e:\Textming\data\raw\fed_minutes.csv"
-    OUTPUT_PATH = r"e:\Textming\data\processed\fed_minutes_sentences_structured.csv"
+    INPUT_PATH = r"e:\Textming\data\raw\fed_minutes.parquet"
+    OUTPUT_PATH = r"e:\Textming\data\processed\fed_minutes_sentences_structured.parquet"
     
     df_raw = load_data(INPUT_PATH)
     
     if df_raw is not None:
-        df_sentences = segment_sentences(df_raw)
+        n_sentences = write_sentences_parquet(df_raw, OUTPUT_PATH)
         
         print("\n--- Processing Complete ---")
         print(f"Original Documents: {len(df_raw)}")
-        print(f"Generated Sentences: {len(df_sentences)}")
+        print(f"Generated Sentences: {n_sentences}")
         
+        # 统计信息只读取需要的列，不把整份结果载入内存
         print("\nDistribution of Sections:")
-        if 'section' in df_sentences.columns:
-            print(df_sentences['section'].value_counts())
+        print(pd.read_parquet(OUTPUT_PATH, columns=['section'])['section'].value_counts())
         
         print("\nSample Data:")
         display_cols = ['date', 'section', 'sentence_text']
-        print(df_sentences[display_cols].head(10))
+        parquet_file = pq.ParquetFile(OUTPUT_PATH)
+        if parquet_file.metadata.num_rows:
+            print(next(parquet_file.iter_batches(batch_size=10, columns=display_cols)).to_pandas())
         
-        df_sentences.to_csv(OUTPUT_PATH, index=False, encoding='utf-8-sig')
-        print(f"\nSaved structured data to: {OUTPUT_PATH}")
\ No newline at end of file
+        print(f"\nSaved structured data to: {OUTPUT_PATH}")
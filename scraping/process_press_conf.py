@@ -1,9 +1,11 @@
-import pdfplumber
-import pandas as pd
+import pypdfium2 as pdfium
+import pyarrow as pa
+import pyarrow.parquet as pq
 import os
 import re
 import csv
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
 # Add parent directory to path to import utils
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
@@ -11,10 +13,68 @@ from utils.utilities import (
     split_into_sentences_robust, 
     clean_common_noise, 
     is_noise_content, 
-    preprocess_content
+    preprocess_and_split
 )
 
+# 预编译的正则常量 (避免每次调用都查 re 的内部缓存)
+_DATE_RE = re.compile(r'(20\d{2})(\d{2})(\d{2})')
+_YEAR_RE = re.compile(r'20\d{2}')
+# 发布会标题残留 (标题变体)，合并成一个正则，每行只需一次 search
+_TITLE_NOISE_PATTERNS = [
+    r"Chair(man)? Powell['']?s? Press Conference",
+    r"Chair Powell['']?s? Press Conference Call"
+]
+_TITLE_NOISE_RE = re.compile('|'.join(f'(?:{p})' for p in _TITLE_NOISE_PATTERNS), re.IGNORECASE)
+# 说话人标记：匹配 "全大写名字 + 标点" (如 MS. BRAINARD.)
+# 名字的字符类本身包含 \s，名字后面不再单独写 \s*，避免长串大写文本上的重复回溯
+_CONF_SPEAKER_RE = re.compile(r"(?:^|\s)([A-Z\s\.\''-]{3,})[\.\:]")
+# 同上，另外把电话会议的转录标题也当作一个"说话人"切开
+_TRANSCRIPT_TITLE = "Transcript of the Federal Open Market Committee Conference Call"
+_SPEAKER_RE = re.compile(r"(?:^|\s)([A-Z\s\.\''-]{3,}|" + _TRANSCRIPT_TITLE + r"\s*)[\.\:]")
+
+# 输出 CSV 的列
+OUTPUT_COLUMNS = ['date', 'section', 'text', 'speaker']
+# Parquet 输出的列类型：section 只有少数几个取值，用字典编码；speaker 缺失时为 null
+OUTPUT_SCHEMA = pa.schema([
+    ('date', pa.string()),
+    ('section', pa.dictionary(pa.int32(), pa.string())),
+    ('text', pa.string()),
+    ('speaker', pa.string())
+])
+
+def _get_max_workers(n_jobs):
+    """进程数不超过 CPU 核数，也不超过任务数，避免过度订阅"""
+    return max(1, min(os.cpu_count() or 1, n_jobs))
+
 class FedPressConfProcessor:
+    # 所有标志着 Q&A 环节开始的短语 (覆盖 2018-2024 所有变体)
+    _SPLIT_MARKERS = [
+        "I will now take your questions", 
+        "I am happy to take your questions",
+        "I'm happy to take your questions",
+        "happy to take your questions", 
+        "happy to respond to your questions",
+        "We will now take questions",
+        "Q & A",
+        "MICHELLE SMITH. Thank you", # 主持人转场
+        "MICHELLE SMITH. We will now go to",
+        "MICHELLE SMITH. We'll go to",
+        "MICHELLE SMITH. Let's go to",
+        "MICHELLE SMITH. Our first question",
+        "I'll be happy to take your questions",
+        "I will be happy to take your questions",
+        "we'll be happy to take your questions",
+        "MICHELLE SMITH.", # 兜底策略：如果出现主持人名字，通常意味着 Q&A 开始
+        "look forward to your questions",
+        "I look forward to your questions",
+        "I look forward to taking your questions",
+        "I would be happy to take your questions"
+    ]
+    # 合并成一个正则：一次扫描找到最早出现的标记
+    # (同一位置按列表顺序优先，与逐个 find 取最小下标的结果一致)
+    # 标记预先转成小写，在 text.lower() 上匹配，省去 IGNORECASE 的逐字符大小写折叠
+    _QA_MARKER_RE = re.compile('|'.join(re.escape(m.lower()) for m in _SPLIT_MARKERS))
+
     def __init__(self, data_folder):
         """
         初始化处理器。
@@ -24,77 +84,90 @@ class FedPressConfProcessor:
         # Here we assume data_folder is correct root (e.g. e:\Textming\data)
         self.pdf_folder = os.path.join(data_folder, "raw", "press_conf_pdfs")
         self.output_csv = os.path.join(data_folder, "processed", "fed_press_conf_structured.csv")
+        # 同名 Parquet (列式 + 压缩)，下游优先读取它
+        self.output_parquet = os.path.splitext(self.output_csv)[0] + ".parquet"
 
     def process_pdfs(self):
         """
         【主控制流】
-        遍历所有 PDF 文件，执行清洗、结构化分割，最后保存为 CSV。
+        遍历所有 PDF 文件，执行清洗、结构化分割，最后保存为 CSV 和 Parquet。
         """
         print(f"\n[Processing PDFs] Processing files in {self.pdf_folder}...")
-        all_rows = []
         if not os.path.exists(self.pdf_folder):
              print(f"Error: Folder {self.pdf_folder} does not exist.")
              return
 
-        # 获取目录下所有 PDF 文件
-        files = [f for f in os.listdir(self.pdf_folder) if f.endswith('.pdf')]
+        # 获取目录下所有 PDF 文件 (scandir 一次系统调用拿到条目类型；按文件名排序保证输出顺序稳定)
+        with os.scandir(self.pdf_folder) as it:
+            files = sorted(e.name for e in it if e.is_file() and e.name.lower().endswith('.pdf'))
         
-        for filename in files:
-            print(f"  Processing: {filename}")
-            file_path = os.path.join(self.pdf_folder, filename)
-            
-            # 1. 元数据提取：从文件名中解析出准确的日期 (YYYY-MM-DD)
-            date_str = self._extract_date_from_filename(filename)
-            
-            # 2. 类型判断：文件名包含 "confcall" 说明是电话会议，处理逻辑不同
-            is_conf_call = "confcall" in filename.lower()
-            
-            # 3. 文本提取：使用 pdfplumber 进行“物理裁剪”，去除页眉页脚的干扰
-            raw_text = self._extract_text_with_crop(file_path)
-            if not raw_text: continue
-            
-            # 4. 噪音清洗：使用正则去除 PDF 中残留的页码、标题、日期行
-            clean_text = self._clean_noise(raw_text)
-            
-            # 5. 结构化分割与说话人提取 (核心逻辑)
-            if is_conf_call:
-                # 如果是电话会议：提取多方对话（因为没有 Q&A 环节）
-                segments = self._process_conf_call(clean_text, date_str)
-            else:
-                # 如果是常规发布会：分割 Opening 和 Q&A，并只提取鲍威尔的发言
-                segments = self._structure_press_conf(clean_text, date_str)
-            
-            all_rows.extend(segments)
-            
-        # 6. 数据保存
-        df = pd.DataFrame(all_rows)
-        if not df.empty:
-            # 重新排列列顺序，确保 date 在最前面，方便阅读
-            cols = ['date', 'section', 'text']
-            for c in df.columns:
-                if c not in cols:
-                    cols.append(c)
-            df = df[cols]
-            
-            # Ensure output directory exists
-            os.makedirs(os.path.dirname(self.output_csv), exist_ok=True)
+        # Ensure output directory exists
+        os.makedirs(os.path.dirname(self.output_csv), exist_ok=True)
         
+        total = 0
+        with open(self.output_csv, 'w', newline='', encoding='utf-8-sig') as f, \
+                pq.ParquetWriter(self.output_parquet, OUTPUT_SCHEMA, compression='snappy') as pq_writer:
+            # 列顺序：date 在最前面，方便阅读；speaker 只有电话会议才有，其余留空
             # 关键参数 quoting=csv.QUOTE_ALL：
             # 强制给所有文本加引号。防止因为文本里包含逗号(,)，导致 CSV 列错位。
-            df.to_csv(self.output_csv, index=False, encoding='utf-8-sig', quoting=csv.QUOTE_ALL)
-            print(f"\n[Processing Complete] Saved {len(df)} segments to {self.output_csv}")
+            writer = csv.DictWriter(f, fieldnames=OUTPUT_COLUMNS, quoting=csv.QUOTE_ALL)
+            writer.writeheader()
+            
+            # 每个 PDF 的解析互不依赖且是 CPU 密集型，分发到多个进程并行处理
+            # 6. 数据保存：每个文件的结果一返回就直接写入 CSV 和 Parquet，不在内存中累积全部分段
+            # (ex.map 保持文件顺序)
+            with ProcessPoolExecutor(max_workers=_get_max_workers(len(files))) as ex:
+                for segments in ex.map(self._process_one_pdf, files):
+                    if not segments:
+                        continue
+                    writer.writerows(segments)
+                    pq_writer.write_table(pa.Table.from_pylist(segments, schema=OUTPUT_SCHEMA))
+                    total += len(segments)
+        
+        if total:
+            print(f"\n[Processing Complete] Saved {total} segments to {self.output_csv} and {self.output_parquet}")
         else:
+            os.remove(self.output_csv)
+            os.remove(self.output_parquet)
             print("\n[Processing Complete] No data found.")
 
+    def _process_one_pdf(self, filename):
+        """
+        处理单个 PDF (步骤 1-5)，返回该文件的分段列表。
+        在子进程中运行，因此只依赖 filename 和实例上的路径配置。
+        """
+        print(f"  Processing: {filename}")
+        file_path = os.path.join(self.pdf_folder, filename)
+        
+        # 1. 元数据提取：从文件名中解析出准确的日期 (YYYY-MM-DD)
+        date_str = self._extract_date_from_filename(filename)
+        
+        # 2. 类型判断：文件名包含 "confcall" 说明是电话会议，处理逻辑不同
+        is_conf_call = "confcall" in filename.lower()
+        
+        # 3. 文本提取：使用 pypdfium2 按坐标“物理裁剪”，去除页眉页脚的干扰
+        raw_text = self._extract_text_with_crop(file_path)
+        if not raw_text: return []
+        
+        # 4. 噪音清洗：使用正则去除 PDF 中残留的页码、标题、日期行
+        clean_text = self._clean_noise(raw_text)
+        
+        # 5. 结构化分割与说话人提取 (核心逻辑)
+        if is_conf_call:
+            # 如果是电话会议：提取多方对话（因为没有 Q&A 环节）
+            return self._process_conf_call(clean_text, date_str)
+        # 如果是常规发布会：分割 Opening 和 Q&A，并只提取鲍威尔的发言
+        return self._structure_press_conf(clean_text, date_str)
+
     def _extract_date_from_filename(self, filename):
         """
         从文件名 (如 FOMCpresconf20230322.pdf) 提取日期。
         如果提取不到具体日期，则回退到提取年份。
         """
-        match = re.search(r'(20\d{2})(\d{2})(\d{2})', filename)
+        match = _DATE_RE.search(filename)
         if match:
             return f"{match.group(1)}-{match.group(2)}-{match.group(3)}"
-        match_year = re.search(r'20\d{2}', filename)
+        match_year = _YEAR_RE.search(filename)
         return f"{match_year.group(0)}-01-01" if match_year else "Unknown"
 
     def _extract_text_with_crop(self, pdf_path):
@@ -102,22 +175,32 @@ class FedPressConfProcessor:
         【物理去噪】
         PDF 每一页都有页眉（Page X of Y）和页脚（FINAL）。
         与其用正则删，不如直接按坐标裁剪掉页面顶部 15% 和底部 10%。
+        使用 pypdfium2 (C 实现的 PDFium)，只提取裁剪矩形内的文字，比 pdfplumber 快得多。
         """
-        text = ""
+        parts = []  # 逐页收集后一次 join，避免 += 的重复拷贝
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    # 定义保留区域：Top 15% 到 Bottom 10% 之间的部分
-                    crop_box = (0, page.height * 0.15, page.width, page.height * 0.9)
-                    try:
-                        text += page.crop(crop_box).extract_text() + "\n"
-                    except:
-                        # 如果裁剪失败（如页面太小），则提取整页作为兜底
-                        text += page.extract_text() + "\n"
+            pdf = pdfium.PdfDocument(pdf_path)
         except Exception as e:
             print(f"    Error reading PDF: {e}")
             return None
-        return text
+        try:
+            for page in pdf:
+                textpage = page.get_textpage()
+                width, height = page.get_size()
+                try:
+                    # 定义保留区域：Top 15% 到 Bottom 10% 之间的部分
+                    # (PDFium 坐标原点在左下角，所以 bottom=10%，top=85%)
+                    parts.append(textpage.get_text_bounded(left=0, bottom=height * 0.1, right=width, top=height * 0.85))
+                except Exception:
+                    # 如果裁剪失败（如页面太小），则提取整页作为兜底
+                    parts.append(textpage.get_text_range())
+                finally:
+                    textpage.close()
+                    page.close()
+                parts.append("\n")
+        finally:
+            pdf.close()
+        return "".join(parts)
 
     def _clean_noise(self, text):
         """
@@ -129,24 +212,10 @@ class FedPressConfProcessor:
         text = clean_common_noise(text)
         
         # Then clean specific Press Conference artifacts
-        lines = text.split('\n')
-        cleaned = []
-        patterns = [
-            r"Chair(man)? Powell['']?s? Press Conference", # 标题变体
-            r"Chair Powell['']?s? Press Conference Call" 
+        cleaned = [
+            line for raw_line in text.split('\n')
+            if (line := raw_line.strip()) and not _TITLE_NOISE_RE.search(line)
         ]
-        
-        for line in lines:
-            line = line.strip()
-            if not line: continue
-            
-            is_noise = False
-            for pat in patterns:
-                if re.search(pat, line, re.IGNORECASE):
-                    is_noise = True
-                    break
-            if not is_noise:
-                cleaned.append(line)
         return " ".join(cleaned)
 
     def _structure_press_conf(self, text, date_str):
@@ -154,47 +223,14 @@ class FedPressConfProcessor:
         【结构化分割】
         将发布会切分为 'Opening Statement' (开场白) 和 'Q&A' (问答)。
         """
-        # 定义所有标志着 Q&A 环节开始的短语 (覆盖 2018-2024 所有变体)
-        split_markers = [
-            "I will now take your questions", 
-            "I am happy to take your questions",
-            "I'm happy to take your questions",
-            "happy to take your questions", 
-            "happy to respond to your questions",
-            "We will now take questions",
-            "Q & A",
-            "MICHELLE SMITH. Thank you", # 主持人转场
-            "MICHELLE SMITH. We will now go to",
-            "MICHELLE SMITH. We'll go to",
-            "MICHELLE SMITH. Let's go to",
-            "MICHELLE SMITH. Our first question",
-            "I'll be happy to take your questions",
-            "I will be happy to take your questions",
-            "we'll be happy to take your questions",
-            "MICHELLE SMITH.", # 兜底策略：如果出现主持人名字，通常意味着 Q&A 开始
-            "look forward to your questions",
-            "I look forward to your questions",
-            "I look forward to taking your questions",
-            "I would be happy to take your questions"
-        ]
-        
-        split_idx = -1
-        text_lower = text.lower()
-        
         # 寻找在文本中出现得 *最早* 的分割标记
-        min_idx = float('inf')
-        found_marker = None
-        
-        for marker in split_markers:
-            idx = text_lower.find(marker.lower())
-            if idx != -1 and idx < min_idx:
-                min_idx = idx
-                found_marker = marker
+        # 在小写副本上搜索，下标用于切分原文 (保留原始大小写)
+        m = self._QA_MARKER_RE.search(text.lower())
+        split_idx = m.start() if m else -1
+        found_marker = m.group(0) if m else None
         
-        if min_idx != float('inf'):
-            split_idx = min_idx
-            # print(f"DEBUG: Found earliest marker '{found_marker}' at {split_idx} for date {date_str}")
-        else:
+        # print(f"DEBUG: Found earliest marker '{found_marker}' at {split_idx} for date {date_str}")
+        if split_idx == -1:
             print(f"DEBUG: No marker found for date {date_str}")
         
         segments = []
@@ -234,9 +270,8 @@ class FedPressConfProcessor:
         策略：保留所有有效的发言内容。
         """
         segments = []
-        # 正则：匹配 "全大写名字 + 标点" (如 MS. BRAINARD.)
-        speaker_pattern = re.compile(r"(?:^|\s)([A-Z\s\.\''-]{3,})\s*[\.\:]")
-        parts = speaker_pattern.split(text)
+        # 按 "全大写名字 + 标点" (如 MS. BRAINARD.) 切分
+        parts = _CONF_SPEAKER_RE.split(text)
         
         if len(parts) >= 2:
             for i in range(1, len(parts), 2):
@@ -249,18 +284,14 @@ class FedPressConfProcessor:
 
                 # 对发言内容进行句子分割，与其他部分保持一致
                 if len(content.strip()) > 10:
-                    # 预处理内容以获得更细粒度的分割
-                    content_segments = preprocess_content(content)
-                    for segment in content_segments:
-                        if len(segment.strip()) > 10:
-                            sentences = split_into_sentences_robust(segment)
-                            for sentence in sentences:
-                                segments.append({
-                                    'date': date_str,
-                                    'section': 'Conference Call',
-                                    'speaker': speaker, # 保留说话人名字，因为可能有其他人
-                                    'text': sentence
-                                })
+                    # 预处理内容以获得更细粒度的分割，再逐段分句
+                    for sentence in preprocess_and_split(content):
+                        segments.append({
+                            'date': date_str,
+                            'section': 'Conference Call',
+                            'speaker': speaker, # 保留说话人名字，因为可能有其他人
+                            'text': sentence
+                        })
         return segments
 
     def _extract_speaker_segments(self, text, is_qa):
@@ -268,11 +299,16 @@ class FedPressConfProcessor:
         【说话人过滤器】(Speaker Filter)
         这是本脚本最核心的功能：只提取 Powell 的发言，丢弃记者的提问。
         """
-        # 正则：寻找 "CHAIR POWELL." 或 "MR. POWELL:" 这样的标记
-        pattern = re.compile(r"(?:^|\s)([A-Z\s\.\''-]{3,}|Transcript of the Federal Open Market Committee Conference Call)\s*[\.\:]")
-        
+        # 快速路径：Q&A 中只保留 Powell (或转录标题) 名下的内容，文本里根本没有这些标记时不必跑 split
+        # (说话人正则的字符类只匹配大写，所以 "POWELL" 和全大写的 "TRANSCRIPT OF THE FEDERAL" 标题
+        #  都用区分大小写的子串判断；混合大小写的标题由 _TRANSCRIPT_TITLE 覆盖)
+        if (is_qa and "POWELL" not in text and "TRANSCRIPT OF THE FEDERAL" not in text
+                and _TRANSCRIPT_TITLE not in text):
+            return []
+
+        # 用 _SPEAKER_RE 寻找 "CHAIR POWELL." 或 "MR. POWELL:" 这样的标记
         # split 后会得到 [垃圾, 名字, 内容, 名字, 内容...]
-        parts = pattern.split(text)
+        parts = _SPEAKER_RE.split(text)
         valid_segments = []
         
         if len(parts) < 2:
@@ -296,12 +332,8 @@ class FedPressConfProcessor:
                 
                 # 将这一段发言切分成句子
                 if len(content) > 10:
-                    # 预处理：将内容按段落分割，以获得更细粒度的文本块
-                    content_segments = preprocess_content(content)
-                    for segment in content_segments:
-                        if len(segment.strip()) > 10:
-                            sentences = split_into_sentences_robust(segment)
-                            valid_segments.extend(sentences)
+                    # 预处理：将内容按段落分割，以获得更细粒度的文本块，再逐段分句
+                    valid_segments.extend(preprocess_and_split(content))
         
         return valid_segments
 
@@ -1,8 +1,13 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import os
 import re
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 
 # Path setup to import utils
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -15,88 +20,120 @@ from utils.utilities import (
 )
 
 # Configuration
-INPUT_FILE = os.path.join(PROJECT_ROOT, "data", "raw", "fed_speeches.csv")
-OUTPUT_FILE = os.path.join(PROJECT_ROOT, "data", "processed", "fed_speeches_sentences.csv")
+INPUT_FILE = os.path.join(PROJECT_ROOT, "data", "raw", "fed_speeches.parquet")
+LEGACY_INPUT_FILE = os.path.join(PROJECT_ROOT, "data", "raw", "fed_speeches.csv")
+OUTPUT_FILE = os.path.join(PROJECT_ROOT, "data", "processed", "fed_speeches_sentences.parquet")
+CHUNK_SIZE = 10_000  # raw segments per read/process/write step
+MAX_WORKERS = os.cpu_count() or 1  # chunks are cleaned/split in parallel worker processes
+
+OUTPUT_SCHEMA = pa.schema([
+    ('date', pa.string()),
+    ('title', pa.string()),
+    ('text', pa.string()),
+    ('source_type', pa.dictionary(pa.int32(), pa.string())),
+    ('url', pa.string())
+])
+
+# Precompiled patterns
+# Date embedded in speech URLs: .../powell20181206a.htm -> 2018-12-06
+_URL_DATE_RE = re.compile(r'(\d{4})(\d{2})(\d{2})')
+# Segments to drop after cleaning: empty, or starting with a citation like "12. Smith, J. ... (2019)"
+_DROP_RE = re.compile(r'$|\d+\.\s+[A-Z].*\(\d{4}\)')
+
+# Speeches repeat boilerplate paragraphs verbatim (footers, disclaimers):
+# memoize the per-text helpers so each distinct paragraph is processed once
+_clean_cached = lru_cache(maxsize=65536)(clean_common_noise)
+
+@lru_cache(maxsize=65536)
+def _split_cached(text):
+    return tuple(split_into_sentences_robust(text))
+
+def iter_input_chunks(chunksize=CHUNK_SIZE):
+    """
+    Yields the raw speech table as DataFrame chunks (Parquet first, legacy CSV fallback).
+    """
+    if os.path.exists(INPUT_FILE):
+        for batch in pq.ParquetFile(INPUT_FILE).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        # Fall back to the CSV written by older scraper runs
+        with pd.read_csv(LEGACY_INPUT_FILE, chunksize=chunksize) as reader:
+            yield from reader
 
-def extract_date_from_url(url):
+def process_chunk(df, text_col):
     """
-    Extracts date from URL.
-    Expected format: .../powell20181206a.htm -> 2018-12-06
+    Turns a chunk of raw speech segments into one row per cleaned sentence.
     """
-    if not isinstance(url, str):
-        return None
-    
-    # Look for 8 digits in the URL (YYYYMMDD)
-    match = re.search(r'(\d{4})(\d{2})(\d{2})', url)
-    if match:
-        year, month, day = match.groups()
-        return f"{year}-{month}-{day}"
-    return None
+    # Column-wise instead of iterrows: only the text helpers still run per row
+    df = df[df[text_col].map(lambda t: isinstance(t, str))]
+    urls = df['url'] if 'url' in df.columns else pd.Series('', index=df.index)
+
+    # Extract date from URL if possible (YYYYMMDD -> YYYY-MM-DD)
+    # Use extracted date if available, otherwise fallback to existing date column
+    parts = urls.fillna('').astype(str).str.extract(_URL_DATE_RE)
+    extracted_dates = (parts[0] + '-' + parts[1] + '-' + parts[2]).astype(object)
+    current_dates = df['date'] if 'date' in df.columns else None
+    final_dates = extracted_dates.where(extracted_dates.notna(), current_dates)
+
+    # 1. Pre-cleaning (remove headers, references) using shared utility
+    cleaned_text = df[text_col].map(_clean_cached)
+
+    # Additional speech specific cleaning: drop empty segments and those that start with a citation
+    # (Though clean_common_noise handles headers, let's keep the citation check if it's specific)
+    # One anchored regex test per segment covers both cases
+    keep = ~cleaned_text.str.match(_DROP_RE)
+
+    # 2. Robust Sentence Segmentation
+    # This utility takes care of splitting, noise filtering (short sentences), and recursive splitting
+    df_out = pd.DataFrame({
+        'date': final_dates[keep],
+        'title': df['title'][keep] if 'title' in df.columns else 'Unknown',
+        'text': cleaned_text[keep].map(_split_cached),
+        'source_type': 'Speech',
+        'url': urls[keep] # Keeping URL for reference
+    })
+    # One row per sentence; segments that produced no sentences are dropped
+    df_out = df_out.explode('text')
+    return df_out[df_out['text'].notna()]
 
 def process_speeches():
-    if not os.path.exists(INPUT_FILE):
+    if not os.path.exists(INPUT_FILE) and not os.path.exists(LEGACY_INPUT_FILE):
         print(f"Error: Input file not found at {INPUT_FILE}")
         return
-    else:
-        df = pd.read_csv(INPUT_FILE)
-
-    print(f"Loaded {len(df)} raw speech segments.")
 
-    processed_rows = []
-
-    # Check if 'text' column exists, if not try 'text_segment'
-    text_col = 'text' if 'text' in df.columns else 'text_segment'
-    if text_col not in df.columns:
-        print(f"Error: Neither 'text' nor 'text_segment' column found in {INPUT_FILE}")
-        return
-
-    for idx, row in df.iterrows():
-        text = row.get(text_col, '') 
-        if not isinstance(text, str):
-            continue
-
-        # Extract date from URL if possible
-        url = row.get('url', '')
-        extracted_date = extract_date_from_url(url)
-        
-        # Use extracted date if available, otherwise fallback to existing date column
-        # If existing date is 'Unknown' or missing, extracted_date takes precedence
-        current_date = row.get('date')
-        final_date = extracted_date if extracted_date else current_date
-
-        # 1. Pre-cleaning (remove headers, references) using shared utility
-        # We can perform additional specific cleaning here if needed
-        cleaned_text = clean_common_noise(text)
-        
-        # Additional speech specific cleaning: remove lines starting with citation style numbers if not handled by utils
-        # (Though clean_common_noise handles headers, let's keep the citation check if it's specific)
-        if re.match(r'^\d+\.\s+[A-Z].*\(\d{4}\)', cleaned_text):
-            continue
-
-        if not cleaned_text:
-            continue
-
-        # 2. Robust Sentence Segmentation
-        # This utility takes care of splitting, noise filtering (short sentences), and recursive splitting
-        sentences = split_into_sentences_robust(cleaned_text)
-
-        for sent in sentences:
-            processed_rows.append({
-                'date': final_date,
-                'title': row.get('title', 'Unknown'),
-                'text': sent,
-                'source_type': 'Speech',
-                'url': url # Keeping URL for reference
-            })
-
-    # Save
-    df_out = pd.DataFrame(processed_rows)
-    
     # Ensure output directory exists
     os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-    
-    df_out.to_csv(OUTPUT_FILE, index=False)
-    print(f"Processing complete. Saved {len(df_out)} sentences to {OUTPUT_FILE}")
+
+    # Read -> process -> write one chunk at a time so peak memory does not grow with the input
+    # Parquet: columnar + compressed, read preferentially by the integration notebook
+    # Chunks are independent and CPU-bound (regex + Punkt): they run on a process pool,
+    # with at most 2 * MAX_WORKERS chunks in flight and results written in input order
+    total_in = total_out = 0
+    with pq.ParquetWriter(OUTPUT_FILE, OUTPUT_SCHEMA, compression='snappy') as writer, \
+            ProcessPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        pending = deque()
+
+        def write_oldest():
+            df_out = pending.popleft().result()
+            writer.write_table(pa.Table.from_pandas(df_out, schema=OUTPUT_SCHEMA, preserve_index=False))
+            return len(df_out)
+
+        for chunk in iter_input_chunks():
+            # Check if 'text' column exists, if not try 'text_segment'
+            text_col = 'text' if 'text' in chunk.columns else 'text_segment'
+            if text_col not in chunk.columns:
+                print(f"Error: Neither 'text' nor 'text_segment' column found in {INPUT_FILE}")
+                return
+
+            pending.append(ex.submit(process_chunk, chunk, text_col))
+            total_in += len(chunk)
+            if len(pending) >= 2 * MAX_WORKERS:
+                total_out += write_oldest()
+        while pending:
+            total_out += write_oldest()
+
+    print(f"Loaded {total_in} raw speech segments.")
+    print(f"Processing complete. Saved {total_out} sentences to {OUTPUT_FILE}")
 
 if __name__ == "__main__":
     process_speeches()
\ No newline at end of file
@@ -1,34 +1,57 @@
-import requests
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 import pandas as pd
 import time
 import random
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
+
+# 8-digit meeting date in minutes links (e.g. fomcminutes20180131.htm)
+_HREF_DATE_RE = re.compile(r'(\d{8})')
+MINUTES_COLUMNS = ['date', 'type', 'title', 'text', 'segment_id', 'url']
 
 class MinutesScraper:
-    def __init__(self, start_year=2018, end_year=2024):
+    def __init__(self, start_year=2018, end_year=2024, max_workers=8):
         self.start_year = start_year
         self.end_year = end_year
+        self.max_workers = max_workers
         self.base_url = "https://www.federalreserve.gov"
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
-        self.data = []
+        # One pooled session: keep-alive reuses the TLS connection to the Fed host
+        # Responses are cached on disk for a day; after that they are revalidated with
+        # ETag/Last-Modified, so re-runs skip unchanged pages. The cache lives in the
+        # git-ignored .fed_http_cache.sqlite at the project root, not next to the data
+        cache_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".fed_http_cache")
+        self.session = requests_cache.CachedSession(cache_path, backend='sqlite', expire_after=86400, stale_if_error=True)
+        self.session.headers.update(self.headers)
+        retries = Retry(total=3, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504))
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retries)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Column lists, turned into a DataFrame once in save()
+        self.data = {col: [] for col in MINUTES_COLUMNS}
 
     def get_soup(self, url):
         try:
             print(f"Fetching: {url}")
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.session.get(url, timeout=10)
             response.raise_for_status()
-            time.sleep(random.uniform(1, 3))
-            return BeautifulSoup(response.content, 'html.parser')
+            # Only throttle requests that actually went to the server
+            if not getattr(response, 'from_cache', False):
+                time.sleep(random.uniform(1, 3))
+            return BeautifulSoup(response.content, 'lxml')
         except Exception as e:
             print(f"Error fetching {url}: {e}")
             return None
 
     def scrape(self):
         print("\n--- Starting FOMC Minutes Scraping ---")
+        targets = []
         for year in range(self.start_year, self.end_year + 1):
             if year >= 2020:
                 url = f"{self.base_url}/monetarypolicy/fomccalendars.htm"
@@ -45,19 +68,34 @@ class MinutesScraper:
                 if f'fomcminutes{year}' in href and href.endswith('.htm'):
                     minutes_url = self.base_url + href if href.startswith('/') else href
                     
-                    date_match = re.search(r'(\d{8})', href)
+                    date_match = _HREF_DATE_RE.search(href)
                     if date_match:
                         date_str = date_match.group(1)
                         formatted_date = f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}"
                     else:
                         formatted_date = f"{year}-01-01"
 
-                    self._parse_detail(minutes_url, formatted_date)
+                    targets.append((minutes_url, formatted_date))
+
+        # Detail pages are independent and I/O-bound: fetch them on a thread pool
+        # sharing the pooled session; rows are appended in target order
+        with ThreadPoolExecutor(max_workers=self.max_workers) as ex:
+            pages = ex.map(lambda target: self._parse_detail(target[0]), targets)
+            for (url, date), (segment_ids, texts) in zip(targets, pages):
+                n = len(texts)
+                self.data['date'] += [date] * n
+                self.data['type'] += ['Minutes'] * n
+                self.data['title'] += ['FOMC Minutes'] * n
+                self.data['text'] += texts
+                self.data['segment_id'] += segment_ids
+                self.data['url'] += [url] * n
 
-    def _parse_detail(self, url, date):
+    def _parse_detail(self, url):
+        # Returns (segment_ids, texts) for the kept paragraphs of one minutes page
+        segment_ids, texts = [], []
         soup = self.get_soup(url)
         if not soup:
-            return
+            return segment_ids, texts
 
         content_div = soup.find('div', id='article')
         if not content_div:
@@ -71,15 +109,10 @@ class MinutesScraper:
             for i, p in enumerate(paragraphs):
                 p_text = p.get_text(strip=True)
                 if len(p_text) > 50:
-                    self.data.append({
-                        'date': date,
-                        'type': 'Minutes',
-                        'title': 'FOMC Minutes',
-                        'text': p_text,
-                        'segment_id': i,
-                        'url': url
-                    })
+                    segment_ids.append(i)
+                    texts.append(p_text)
             print(f"Parsed Minutes from {url}")
+        return segment_ids, texts
 
     def save(self):
         df = pd.DataFrame(self.data)
@@ -94,9 +127,10 @@ class MinutesScraper:
         # Ensure the data directory exists
         os.makedirs(data_dir, exist_ok=True)
         
-        filename = os.path.join(data_dir, "fed_minutes.csv")
+        filename = os.path.join(data_dir, "fed_minutes.parquet")
         
-        df.to_csv(filename, index=False, encoding='utf-8-sig')
+        # Parquet keeps dtypes and is read column-wise by the processing scripts
+        df.to_parquet(filename, engine='pyarrow', compression='snappy', index=False)
         print(f"\nMinutes saved to {filename}. Total records: {len(df)}")
 
 if __name__ == "__main__":
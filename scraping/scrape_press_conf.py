@@ -1,22 +1,45 @@
-import requests
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 class FedPressConfScraper:
-    def __init__(self, data_folder):
+    def __init__(self, data_folder, max_workers=8):
         self.pdf_folder = os.path.join(data_folder, "raw", "press_conf_pdfs")
+        self.max_workers = max_workers
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
-        
+        # One pooled session: keep-alive reuses the TLS connection to the Fed host
+        # HTML pages are cached on disk for a day; after that they are revalidated with
+        # ETag/Last-Modified. PDFs are not cached (files already on disk are skipped).
+        # The cache lives in the git-ignored .fed_http_cache.sqlite at the project root
+        cache_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".fed_http_cache")
+        self.session = requests_cache.CachedSession(
+            cache_path, backend='sqlite', expire_after=86400, stale_if_error=True,
+            urls_expire_after={'*.pdf': requests_cache.DO_NOT_CACHE}
+        )
+        self.session.headers.update(self.headers)
+        retries = Retry(total=3, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504))
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retries)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
         if not os.path.exists(self.pdf_folder):
             os.makedirs(self.pdf_folder)
 
     def download_pdfs(self, start_year=2018, end_year=2024):
         print(f"\n[Downloading PDFs] Starting download to {self.pdf_folder}...")
-        downloaded = set(os.listdir(self.pdf_folder))
+        with os.scandir(self.pdf_folder) as it:
+            downloaded = {e.name for e in it if e.is_file()}
         base_url = "https://www.federalreserve.gov"
+        pdf_hrefs = []
+        # index_url -> [(href, link text)]; fomccalendars.htm serves every recent year,
+        # so each index page is fetched and parsed only once per run
+        page_links = {}
 
         for year in range(start_year, end_year + 1):
             target_urls = [
@@ -30,60 +53,83 @@ class FedPressConfScraper:
             for index_url in target_urls:
                 if found_year and "fomccalendars" in index_url: break 
                 try:
-                    resp = requests.get(index_url, headers=self.headers, timeout=10)
-                    if resp.status_code != 200: continue
+                    if index_url not in page_links:
+                        resp = self.session.get(index_url, timeout=10)
+                        if resp.status_code != 200:
+                            page_links[index_url] = []
+                        else:
+                            soup = BeautifulSoup(resp.content, 'lxml')
+                            page_links[index_url] = [(link['href'], link.get_text().strip())
+                                                     for link in soup.find_all('a', href=True)]
                     
-                    soup = BeautifulSoup(resp.content, 'html.parser')
-                    links = soup.find_all('a', href=True)
-                    
-                    for link in links:
-                        href = link['href']
-                        text = link.get_text().strip()
-                        
+                    for href, text in page_links[index_url]:
                         if str(year) not in href and str(year) not in text: continue
                         
                         is_target_pdf = href.lower().endswith('.pdf') and ("presconf" in href.lower() or "confcall" in href.lower())
                         
                         if is_target_pdf:
-                            self._download_file(base_url, href, downloaded)
+                            pdf_hrefs.append(href)
                             found_year = True
                         elif "fomcpresconf" in href.lower() and href.lower().endswith('.htm'):
-                            self._handle_intermediate_page(base_url, href, downloaded)
+                            pdf_hrefs.extend(self._handle_intermediate_page(base_url, href))
                             found_year = True
                             
                 except Exception as e:
                     print(f"    Error accessing {index_url}: {e}")
         
+        # Each file once, skipping those already on disk (only completed downloads
+        # get their final name, so a failed one is retried on the next run)
+        pending = []
+        for href in pdf_hrefs:
+            filename = href.split('/')[-1]
+            if filename not in downloaded:
+                downloaded.add(filename)
+                pending.append(href)
+
+        # Downloads are I/O-bound: run them on a thread pool sharing the pooled session
+        with ThreadPoolExecutor(max_workers=self.max_workers) as ex:
+            list(ex.map(lambda href: self._download_file(base_url, href), pending))
+        
         print(f"\n[Download Complete] Total PDFs: {len(os.listdir(self.pdf_folder))}")
 
-    def _handle_intermediate_page(self, base_url, href, downloaded):
+    def _handle_intermediate_page(self, base_url, href):
+        # Returns the press conference PDF links found on an intermediate page
         full_url = base_url + href if href.startswith('/') else href
+        pdf_hrefs = []
         try:
-            resp = requests.get(full_url, headers=self.headers, timeout=10)
+            resp = self.session.get(full_url, timeout=10)
             if resp.status_code == 200:
-                soup = BeautifulSoup(resp.content, 'html.parser')
+                soup = BeautifulSoup(resp.content, 'lxml')
                 for link in soup.find_all('a', href=True):
                     if link['href'].lower().endswith('.pdf') and "presconf" in link['href'].lower():
-                        self._download_file(base_url, link['href'], downloaded)
+                        pdf_hrefs.append(link['href'])
         except Exception:
             pass
+        return pdf_hrefs
 
-    def _download_file(self, base_url, href, downloaded):
+    def _download_file(self, base_url, href):
         filename = href.split('/')[-1]
-        if filename in downloaded: return
-        
         url = base_url + href if href.startswith('/') else href
         save_path = os.path.join(self.pdf_folder, filename)
         
+        part_path = save_path + '.part'
+        
         try:
             print(f"    Downloading: {filename}")
-            r = requests.get(url, headers=self.headers, timeout=15)
-            with open(save_path, 'wb') as f:
-                f.write(r.content)
-            downloaded.add(filename)
+            # Stream to disk in 64 KB chunks instead of holding the whole PDF in memory.
+            # Write to a .part file and rename only once complete, so an interrupted
+            # download never leaves a truncated PDF that later runs would skip
+            with self.session.get(url, stream=True, timeout=15) as r:
+                r.raise_for_status()
+                with open(part_path, 'wb') as f:
+                    for chunk in r.iter_content(chunk_size=1 << 16):
+                        f.write(chunk)
+            os.replace(part_path, save_path)
             time.sleep(1)
         except Exception as e:
             print(f"    Failed: {e}")
+            if os.path.exists(part_path):
+                os.remove(part_path)
 
 if __name__ == "__main__":
     DATA_ROOT = r"e:\Textming\data"
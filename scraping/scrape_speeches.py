@@ -1,65 +1,103 @@
-import requests
+import aiohttp
+import asyncio
 from bs4 import BeautifulSoup
 import pandas as pd
-import time
 import random
 import os
 import re
 
 class SpeechScraper:
-    def __init__(self, start_year=2018, end_year=2024):
+    def __init__(self, start_year=2018, end_year=2024, max_concurrency=8):
         self.start_year = start_year
         self.end_year = end_year
+        self.max_concurrency = max_concurrency
         self.base_url = "https://www.federalreserve.gov"
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
-        self.data = []
-
-    def get_soup(self, url):
-        try:
-            print(f"Fetching: {url}")
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            time.sleep(random.uniform(1, 3))
-            return BeautifulSoup(response.content, 'html.parser')
-        except Exception as e:
-            print(f"Error fetching {url}: {e}")
-            return None
+        # Column-wise buffers (one list per output column) instead of a dict per row
+        self.dates = []
+        self.titles = []
+        self.texts = []
+        self.segment_ids = []
+        self.urls = []
+
+    async def get_soup(self, session, semaphore, url):
+        # The semaphore bounds in-flight requests; the sleep stays inside it
+        # so each slot keeps the same politeness delay as the old serial loop.
+        async with semaphore:
+            try:
+                print(f"Fetching: {url}")
+                async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                    response.raise_for_status()
+                    content = await response.read()
+                await asyncio.sleep(random.uniform(1, 3))
+            except Exception as e:
+                print(f"Error fetching {url}: {e}")
+                return None
+        return BeautifulSoup(content, 'lxml')
 
     def scrape(self):
         print("\n--- Starting Speeches Scraping ---")
-        for year in range(self.start_year, self.end_year + 1):
-            url = f"{self.base_url}/newsevents/speech/{year}-speeches.htm"
-            soup = self.get_soup(url)
-            if not soup:
+        asyncio.run(self._scrape_async())
+
+    async def _scrape_async(self):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        connector = aiohttp.TCPConnector(limit_per_host=self.max_concurrency, keepalive_timeout=30)
+
+        async with aiohttp.ClientSession(headers=self.headers, connector=connector) as session:
+            # 1. Fetch all yearly listing pages in parallel
+            years = range(self.start_year, self.end_year + 1)
+            listing_urls = [f"{self.base_url}/newsevents/speech/{year}-speeches.htm" for year in years]
+            soups = await asyncio.gather(*(self.get_soup(session, semaphore, url) for url in listing_urls))
+
+            # 2. Collect (url, date, title) for every Powell speech
+            targets = []
+            for soup in soups:
+                if soup:
+                    targets.extend(self._collect_targets(soup))
+
+            # 3. Fetch all detail pages in parallel; gather keeps the original order
+            results = await asyncio.gather(*(self._parse_detail(session, semaphore, url, date, title)
+                                             for url, date, title in targets))
+            for (url, date, title), segments in zip(targets, results):
+                self.dates.extend([date] * len(segments))
+                self.titles.extend([title] * len(segments))
+                self.urls.extend([url] * len(segments))
+                for segment_id, text in segments:
+                    self.segment_ids.append(segment_id)
+                    self.texts.append(text)
+
+    def _collect_targets(self, soup):
+        targets = []
+        events = soup.find_all('div', class_='eventlist__event')
+        if not events:
+            events = soup.find_all('div', class_='row')
+
+        for event in events:
+            text_content = event.get_text()
+            if "Jerome H. Powell" not in text_content and "Chair Powell" not in text_content:
+                continue
+
+            link_tag = event.find('a', href=True)
+            if not link_tag:
                 continue
 
-            events = soup.find_all('div', class_='eventlist__event')
-            if not events:
-                events = soup.find_all('div', class_='row')
-
-            for event in events:
-                text_content = event.get_text()
-                if "Jerome H. Powell" not in text_content and "Chair Powell" not in text_content:
-                    continue
-
-                link_tag = event.find('a', href=True)
-                if not link_tag:
-                    continue
-                
-                speech_url = self.base_url + link_tag['href'] if link_tag['href'].startswith('/') else link_tag['href']
-                title = link_tag.get_text(strip=True)
-                
-                date_tag = event.find('time')
-                date = date_tag.get_text(strip=True) if date_tag else "Unknown"
-
-                self._parse_detail(speech_url, date, title)
-
-    def _parse_detail(self, url, date, title):
-        soup = self.get_soup(url)
+            speech_url = self.base_url + link_tag['href'] if link_tag['href'].startswith('/') else link_tag['href']
+            title = link_tag.get_text(strip=True)
+
+            date_tag = event.find('time')
+            date = date_tag.get_text(strip=True) if date_tag else "Unknown"
+
+            targets.append((speech_url, date, title))
+        return targets
+
+    async def _parse_detail(self, session, semaphore, url, date, title):
+        # Returns (segment_id, text) pairs; url/date/title are filled in by the caller
+        segments = []
+        soup = await self.get_soup(session, semaphore, url)
         if not soup:
-            return
+            return segments
 
         content_div = soup.find('div', class_='col-xs-12 col-sm-8 col-md-8')
         if not content_div:
@@ -69,22 +107,21 @@ class SpeechScraper:
             for script in content_div(["script", "style"]):
                 script.decompose()
             
-            paragraphs = content_div.find_all('p')
-            for i, p in enumerate(paragraphs):
-                p_text = p.get_text(strip=True)
-                if len(p_text) > 50:
-                    self.data.append({
-                        'date': date,
-                        'type': 'Speech',
-                        'title': title,
-                        'text': p_text,
-                        'segment_id': i,
-                        'url': url
-                    })
+            # One get_text pass per <p>, then filter; segment ids keep the <p> position
+            texts = [p.get_text(strip=True) for p in content_div.find_all('p')]
+            segments = [(i, t) for i, t in enumerate(texts) if len(t) > 50]
             print(f"Parsed Speech: {title[:30]}...")
+        return segments
 
     def save(self):
-        df = pd.DataFrame(self.data)
+        df = pd.DataFrame({
+            'date': self.dates,
+            'type': 'Speech',
+            'title': self.titles,
+            'text': self.texts,
+            'segment_id': self.segment_ids,
+            'url': self.urls
+        })
         
         # Get the directory where the script is located (scraping/)
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -96,9 +133,10 @@ class SpeechScraper:
         # Ensure the data directory exists
         os.makedirs(data_dir, exist_ok=True)
         
-        filename = os.path.join(data_dir, "fed_speeches.csv")
+        filename = os.path.join(data_dir, "fed_speeches.parquet")
         
-        df.to_csv(filename, index=False, encoding='utf-8-sig')
+        # Parquet keeps dtypes and is read column-wise by the processing scripts
+        df.to_parquet(filename, engine='pyarrow', compression='snappy', index=False)
         print(f"\nSpeeches saved to {filename}. Total records: {len(df)}")
 
 if __name__ == "__main__":
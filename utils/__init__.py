@@ -1,6 +1,11 @@
 from .utilities import (
     calculate_net_sentiment_counts,
+    calculate_net_sentiment_counts_by,
     calculate_net_sentiment_scores,
+    calculate_net_sentiment_scores_by,
     get_sentiment_label_RoBERTa,     
-    get_sentiment_label_FinBERT_FOMC
+    map_sentiment_labels_RoBERTa,
+    get_sentiment_label_FinBERT_FOMC,
+    map_sentiment_labels_FinBERT_FOMC,
+    get_length_sorted_order
 )
\ No newline at end of file
@@ -1,61 +1,84 @@
-import pandas as pd
-import numpy as np
 import re
-import nltk
-from nltk.tokenize import sent_tokenize
+from functools import lru_cache
 
-# Ensure NLTK data (punkt) is available
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt', quiet=True)
+def ensure_punkt():
+    """Download the NLTK punkt data if it is not installed yet."""
+    import nltk
+    try:
+        nltk.data.find('tokenizers/punkt')
+    except LookupError:
+        nltk.download('punkt', quiet=True)
+
+@lru_cache(maxsize=None)
+def _load_sentence_tokenizer():
+    """Load the English Punkt model on first use and reuse it on every later call."""
+    # nltk is imported here so modules that only need the regex helpers skip it
+    import nltk
+    ensure_punkt()
+    try:
+        from nltk.tokenize.punkt import PunktTokenizer  # NLTK >= 3.8.2
+        return PunktTokenizer('english')
+    except ImportError:
+        return nltk.data.load('tokenizers/punkt/english.pickle')
 
 
 # --- Text Processing Utilities ---
 
+NOISE_PHRASES = [
+    "Thank you", "Thanks", "You're on mute", "Can you hear me", 
+    "[No response]", "(No response)", "hearing no objection",
+    "so moved", "second", "all in favor", "aye",
+    "Return to text" # Common artifact in speeches
+]
+# Lowercased once: exact matches via set lookup, substrings via one alternation
+_NOISE_EXACT = frozenset(phrase.lower() for phrase in NOISE_PHRASES)
+_NOISE_SUB_RE = re.compile('|'.join(re.escape(phrase.lower()) for phrase in NOISE_PHRASES))
+_NOISE_MAX_LEN = max(len(phrase) for phrase in _NOISE_EXACT)
+
 def is_noise_content(text):
     """
     Check if a sentence is conversational noise or irrelevant short text.
     Target: "Thank you", "You're on mute", "[No response]", etc.
     """
-    noise_phrases = [
-        "Thank you", "Thanks", "You're on mute", "Can you hear me", 
-        "[No response]", "(No response)", "hearing no objection",
-        "so moved", "second", "all in favor", "aye",
-        "Return to text" # Common artifact in speeches
-    ]
-    text_lower = text.lower().strip("., ")
-    
     # 1. Too short to be meaningful
     if len(text) < 5: 
         return True 
         
     # 2. Check for noise phrases
-    for phrase in noise_phrases:
-        if text_lower == phrase.lower(): 
-            return True
-        # If phrase is inside a short-ish sentence (e.g. "Thank you very much.")
-        if len(text) < 30 and phrase.lower() in text_lower: 
-            return True
-            
-    return False
+    stripped = text.strip("., ")
+    # Long sentences can neither equal a phrase nor reach the substring check below:
+    # skip lowercasing them (strip first is safe, lower() never adds '.', ',' or ' ')
+    if len(text) >= 30 and len(stripped) > _NOISE_MAX_LEN:
+        return False
+    text_lower = stripped.lower()
+    if text_lower in _NOISE_EXACT:
+        return True
+    # If phrase is inside a short-ish sentence (e.g. "Thank you very much.")
+    return len(text) < 30 and _NOISE_SUB_RE.search(text_lower) is not None
+
+# Split points used by the sentence/segment splitters below
+_CLAUSE_END_RE = re.compile(r'(?<=[.!?;])\s+')
+_COMMA_RE = re.compile(r'(?<=[,])\s+')
+_PARAGRAPH_RE = re.compile(r'\n\s*\n')
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+_SUBCLAUSE_RE = re.compile(r'(?<=[;:,])\s+')
 
 def split_long_sentence(sentence):
     """
     Split overly long sentences (e.g. > 30 words) by punctuation.
     """
     # Split by full stops, question marks, exclamation marks, semicolons
-    split_patterns = r'(?<=[.!?;])\s+'
-    parts = re.split(split_patterns, sentence)
+    parts = _CLAUSE_END_RE.split(sentence)
     valid_parts = []
 
     for part in parts:
         part = part.strip()
+        n_words = len(part.split())  # counted once, reused by both thresholds
         # Ensure part is substantial
-        if len(part.split()) >= 5 and len(part) >= 30 and not is_noise_content(part):
+        if n_words >= 5 and len(part) >= 30 and not is_noise_content(part):
             # If still huge, try splitting by comma
-            if len(part.split()) > 40:
-                comma_parts = re.split(r'(?<=[,])\s+', part)
+            if n_words > 40:
+                comma_parts = _COMMA_RE.split(part)
                 for comma_part in comma_parts:
                     comma_part = comma_part.strip()
                     if len(comma_part.split()) >= 5 and len(comma_part) >= 20:
@@ -70,13 +93,11 @@ def force_split_long_segment(text):
     Force split a text block if it's way too huge (e.g. > 100 words) and has no punctuation.
     """
     words = text.split()
-    segments = []
     # Split every 50 words
-    for i in range(0, len(words), 50):
-        segment_words = words[i:i+50]
-        segment = ' '.join(segment_words)
-        if len(segment_words) >= 3:
-            segments.append(segment)
+    segments = [' '.join(words[i:i + 50]) for i in range(0, len(words), 50)]
+    # Only the last chunk can be shorter than 3 words
+    if len(words) % 50 in (1, 2):
+        segments.pop()
     return segments
 
 def preprocess_content(text):
@@ -84,30 +105,36 @@ def preprocess_content(text):
     Pre-process raw text block to get smaller, manageable paragraphs/segments.
     """
     # Split by double newlines or similar paragraph breaks
-    paragraphs = re.split(r'\n\s*\n', text)
+    # (text without any newline, e.g. clean_common_noise output, is one paragraph: skip the regex)
+    paragraphs = _PARAGRAPH_RE.split(text) if '\n' in text else [text]
     processed_segments = []
     
     for para in paragraphs:
         para = para.strip()
         if not para: continue
         
+        # Keep each segment's word count with it so the final filter does not re-split
+        n_words = len(para.split())
         # If paragraph is long, try splitting by sentence terminators
-        if len(para.split()) > 100:
-            sentences = re.split(r'(?<=[.!?])\s+', para)
+        if n_words > 100:
+            sentences = _SENTENCE_END_RE.split(para)
             for sent in sentences:
                 sent = sent.strip()
-                if len(sent.split()) > 15:
-                    sub_parts = re.split(r'(?<=[;:,])\s+', sent)
-                    processed_segments.extend([p.strip() for p in sub_parts if p.strip() and len(p.split()) >= 3])
+                sent_words = len(sent.split())
+                if sent_words > 15:
+                    for part in _SUBCLAUSE_RE.split(sent):
+                        part = part.strip()
+                        part_words = len(part.split())
+                        if part and part_words >= 3:
+                            processed_segments.append((part, part_words))
                 else:
-                    processed_segments.append(sent)
+                    processed_segments.append((sent, sent_words))
         else:
-            processed_segments.append(para)
+            processed_segments.append((para, n_words))
             
     # Final cleanup: limit size
     filtered_segments = []
-    for seg in processed_segments:
-        word_count = len(seg.split())
+    for seg, word_count in processed_segments:
         if 3 <= word_count <= 100:
             filtered_segments.append(seg)
         elif word_count > 100:
@@ -119,27 +146,29 @@ def split_into_sentences_robust(text):
     """
     Robust sentence splitting pipeline.
     1. Check if empty or short.
-    2. NLTK sent_tokenize.
+    2. NLTK Punkt sentence tokenizer (cached).
     3. Filter noise/short sentences.
     4. Recursively split long sentences.
     """
     if not text or len(text.strip()) < 10:
         return []
 
-    sentences = sent_tokenize(text)
+    sentences = _load_sentence_tokenizer().tokenize(text)
     valid_sentences = []
 
     for sent in sentences:
         sent = sent.strip()
         
+        n_words = len(sent.split())  # counted once, reused by both thresholds
+
         # Basic filtering
-        if len(sent.split()) < 5 or len(sent) < 30:
+        if n_words < 5 or len(sent) < 30:
             continue
         if is_noise_content(sent):
             continue
             
         # Long sentence handling
-        if len(sent.split()) > 30:
+        if n_words > 30:
             sub_sentences = split_long_sentence(sent)
             valid_sentences.extend(sub_sentences)
         else:
@@ -147,33 +176,36 @@ def split_into_sentences_robust(text):
             
     return valid_sentences
 
+def preprocess_and_split(text):
+    """
+    preprocess_content + split_into_sentences_robust in one call.
+    Segments are consumed as they are produced; they are already stripped, and
+    split_into_sentences_robust itself drops segments shorter than 10 characters.
+    """
+    sentences = []
+    for segment in preprocess_content(text):
+        sentences.extend(split_into_sentences_robust(segment))
+    return sentences
+
+COMMON_NOISE_PATTERNS = [
+    r"Page \d+ of \d+",   
+    r"^FINAL$",           
+    r"Transcript of .* Press Conference", 
+    r"^[A-Z][a-z]+ \d{1,2}, 20\d{2}$",
+    r"^SECTION HEADER", # Example placeholder
+    r"Return to text"
+]
+# One alternation: a single regex search per line instead of one per pattern
+_COMMON_NOISE_RE = re.compile('|'.join(f'(?:{p})' for p in COMMON_NOISE_PATTERNS), re.IGNORECASE)
+
 def clean_common_noise(text):
     """
     Remove common PDF/Scraping artifacts (headers, page numbers).
     """
-    lines = text.split('\n')
-    cleaned = []
-    patterns = [
-        r"Page \d+ of \d+",   
-        r"^FINAL$",           
-        r"Transcript of .* Press Conference", 
-        r"^[A-Z][a-z]+ \d{1,2}, 20\d{2}$",
-        r"^SECTION HEADER", # Example placeholder
-        r"Return to text"
+    cleaned = [
+        line for raw_line in text.split('\n')
+        if (line := raw_line.strip()) and not line.isdigit() and not _COMMON_NOISE_RE.search(line)
     ]
-    
-    for line in lines:
-        line = line.strip()
-        if not line or line.isdigit(): continue
-        
-        is_noise = False
-        for pat in patterns:
-            if re.search(pat, line, re.IGNORECASE):
-                is_noise = True
-                break
-        if not is_noise:
-            cleaned.append(line)
-            
     return " ".join(cleaned)
 
 def calculate_net_sentiment_counts(group):
@@ -205,6 +237,31 @@ def calculate_net_sentiment_counts(group):
     return (h - d) / total
 
 
+def calculate_net_sentiment_counts_by(df, group_col):
+    """
+    Vectorized calculate_net_sentiment_counts for every group of df[group_col].
+    Returns a Series indexed by group, same values as groupby().apply().
+    """
+    # pandas/numpy are imported here so text-only users of utils (e.g. PDF workers) skip them
+    import numpy as np
+    import pandas as pd
+
+    col = 'sentiment' if 'sentiment' in df.columns else 'sentiment_label'
+    if col not in df.columns:
+        return pd.Series(0.0, index=df.groupby(group_col).size().index)
+
+    # Plain bool arrays: missing labels (pd.NA in nullable dtypes) count as no match
+    is_h = df[col].eq('Hawkish').to_numpy(dtype=bool, na_value=False)
+    is_d = df[col].eq('Dovish').to_numpy(dtype=bool, na_value=False)
+    is_n = df[col].eq('Neutral').to_numpy(dtype=bool, na_value=False)
+    parts = pd.DataFrame({
+        'net': is_h.astype(np.int64) - is_d.astype(np.int64),
+        'total': (is_h | is_d | is_n).astype(np.int64),
+    }, index=df.index)
+    agg = parts.groupby(df[group_col]).sum()
+    return (agg['net'] / agg['total'].where(agg['total'] > 0)).fillna(0.0)
+
+
 def calculate_net_sentiment_scores(group):
     # Sum scores instead of counts
     h_score = group.loc[group['sentiment'] == 'Hawkish', 'sentiment_score'].sum()
@@ -221,6 +278,63 @@ def calculate_net_sentiment_scores(group):
     # 修正：(鹰派分数 - 鸽派分数)
     return (h_score-d_score ) / total
 
+def calculate_net_sentiment_scores_by(df, group_col):
+    """
+    Vectorized calculate_net_sentiment_scores for every group of df[group_col].
+    Returns a Series indexed by group, same values as groupby().apply().
+    """
+    import numpy as np
+    import pandas as pd
+
+    # Plain bool/float arrays: missing labels (pd.NA in nullable dtypes) count as no match,
+    # missing scores become NaN and are skipped by the sum, as in the per-group version
+    is_h = df['sentiment'].eq('Hawkish').to_numpy(dtype=bool, na_value=False)
+    is_d = df['sentiment'].eq('Dovish').to_numpy(dtype=bool, na_value=False)
+    scores = df['sentiment_score'].to_numpy(dtype=float, na_value=np.nan)
+    parts = pd.DataFrame({
+        'net': np.where(is_h, scores, 0.0) - np.where(is_d, scores, 0.0),
+        'total': (is_h | is_d).astype(np.int64),
+    }, index=df.index)
+    agg = parts.groupby(df[group_col]).sum()
+    return (agg['net'] / agg['total'].where(agg['total'] > 0)).fillna(0.0)
+
+def get_length_sorted_order(texts, tokenizer, max_length=512):
+    """
+    Return the permutation that sorts texts by token length.
+    Batching neighbours of similar length keeps padding per batch small.
+    Use np.argsort(order) to map predictions back to the original order.
+    """
+    import numpy as np
+
+    encoded = tokenizer(texts, add_special_tokens=True, truncation=True,
+                        max_length=max_length, return_length=True)
+    return np.argsort(encoded['length'], kind='stable')
+
+def _lookup_sentiment_label(label_clean, exact, substrings):
+    # Exact label -> one dict lookup; substring rules only for unexpected labels
+    label = exact.get(label_clean)
+    if label is not None:
+        return label
+    for part, label in substrings:
+        if part in label_clean:
+            return label
+    return 'Neutral'
+
+
+# 基于 Paper: 0=Neutral, 1=Positive, 2=Negative
+# Negative (经济差) 意味着央行要放水 -> 鸽派; Positive (经济好) 意味着央行要收紧 -> 鹰派
+_FINBERT_FOMC_LABELS = {
+    'NEGATIVE': 'Dovish', 'POSITIVE': 'Hawkish', 'NEUTRAL': 'Neutral',
+    '0': 'Neutral', '1': 'Hawkish', '2': 'Dovish',
+}
+# 按原优先级: 先文本, 再关键词
+_FINBERT_FOMC_SUBSTRINGS = (
+    ('NEGATIVE', 'Dovish'), ('POSITIVE', 'Hawkish'), ('NEUTRAL', 'Neutral'),
+    ('HAWK', 'Hawkish'), ('DOVE', 'Dovish'),
+)
+
+# Models emit only a few distinct labels; typed=True keeps 1, 1.0 and True apart
+@lru_cache(maxsize=128, typed=True)
 def get_sentiment_label_FinBERT_FOMC(raw_label):
     """
     Map FinBERT-FOMC labels to Hawkish/Dovish/Neutral.
@@ -229,34 +343,21 @@ def get_sentiment_label_FinBERT_FOMC(raw_label):
     - Positive/Label_1 (Good Economy) -> Hawkish (Fed hikes rates)
     """
     label_clean = str(raw_label).upper().replace("LABEL_", "")
-    
-    # --- 1. 优先匹配文本 ---
-    # 修正点：Negative (经济差) 意味着央行要放水 -> 鸽派 (Dovish)
-    if 'NEGATIVE' in label_clean: 
-        return 'Dovish'   
-    # 修正点：Positive (经济好) 意味着央行要收紧 -> 鹰派 (Hawkish)
-    if 'POSITIVE' in label_clean: 
-        return 'Hawkish'  
-    if 'NEUTRAL' in label_clean:
-        return 'Neutral'
-
-    # --- 2. 匹配数字标签 (基于你提供的 Paper: 0=Neutral, 1=Positive, 2=Negative) ---
-    if label_clean == '0': 
-        return 'Neutral'
-    # 1对应Positive -> 经济好 -> 鹰派
-    elif label_clean == '1': 
-        return 'Hawkish'
-    # 2对应Negative -> 经济差 -> 鸽派
-    elif label_clean == '2': 
-        return 'Dovish'
-    
-    # --- 3. 匹配关键词 ---
-    if 'HAWK' in label_clean: return 'Hawkish'
-    if 'DOVE' in label_clean: return 'Dovish'
-    
-    return 'Neutral'
+    return _lookup_sentiment_label(label_clean, _FINBERT_FOMC_LABELS, _FINBERT_FOMC_SUBSTRINGS)
 
 
+# Standard RoBERTa: 0 = Negative, 1 = Neutral, 2 = Positive
+# 坏消息 = 鸽派 (救市); 好消息 = 鹰派 (加息)
+_ROBERTA_LABELS = {
+    'NEGATIVE': 'Dovish', 'POSITIVE': 'Hawkish', 'NEUTRAL': 'Neutral',
+    '0': 'Dovish', '1': 'Neutral', '2': 'Hawkish',
+}
+_ROBERTA_SUBSTRINGS = (
+    ('NEGATIVE', 'Dovish'), ('POSITIVE', 'Hawkish'), ('NEUTRAL', 'Neutral'),
+)
+
+# Models emit only a few distinct labels; typed=True keeps 1, 1.0 and True apart
+@lru_cache(maxsize=128, typed=True)
 def get_sentiment_label_RoBERTa(raw_label):
     """
     Map RoBERTa-large labels to Hawkish/Dovish/Neutral.
@@ -270,22 +371,26 @@ def get_sentiment_label_RoBERTa(raw_label):
     - Positive (Good Economy) -> Hawkish (Hike Rates)
     """
     label_clean = str(raw_label).upper().replace("LABEL_", "")
-    
-    # --- 1. 优先匹配文本标签 ---
-    if 'NEGATIVE' in label_clean:
-        return 'Dovish'   # <--- 改正：坏消息 = 鸽派 (救市)
-    if 'POSITIVE' in label_clean:
-        return 'Hawkish'  # <--- 改正：好消息 = 鹰派 (加息)
-    if 'NEUTRAL' in label_clean:
-        return 'Neutral'
-    
-    # --- 2. 匹配数字标签 (Standard RoBERTa) ---
-    if label_clean == '0':    # 0 is Negative
-        return 'Dovish'       # <--- 改正：Negative -> Dovish
-    elif label_clean == '1':  # 1 is Neutral
-        return 'Neutral'
-    elif label_clean == '2':  # 2 is Positive
-        return 'Hawkish'      # <--- 改正：Positive -> Hawkish
-    
-    # --- 3. 默认返回 ---
-    return 'Neutral'
+    return _lookup_sentiment_label(label_clean, _ROBERTA_LABELS, _ROBERTA_SUBSTRINGS)
+
+
+def _map_sentiment_label_series(labels, exact, substrings):
+    # Clean with vectorized str ops, map exact labels through the dict,
+    # apply the substring rules only to the rows the dict did not cover
+    keys = labels.astype(str).str.upper().str.replace("LABEL_", "", regex=False)
+    mapped = keys.map(exact)
+    missing = mapped.isna()
+    if missing.any():
+        mapped[missing] = keys[missing].map(
+            lambda key: _lookup_sentiment_label(str(key), exact, substrings))
+    return mapped
+
+
+def map_sentiment_labels_FinBERT_FOMC(labels):
+    """Vectorized get_sentiment_label_FinBERT_FOMC for a Series of raw labels."""
+    return _map_sentiment_label_series(labels, _FINBERT_FOMC_LABELS, _FINBERT_FOMC_SUBSTRINGS)
+
+
+def map_sentiment_labels_RoBERTa(labels):
+    """Vectorized get_sentiment_label_RoBERTa for a Series of raw labels."""
+    return _map_sentiment_label_series(labels, _ROBERTA_LABELS, _ROBERTA_SUBSTRINGS)